@@ -3,8 +3,15 @@ import logging
 import re
 import unicodedata
 import shutil
+import errno
+import ctypes
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from argparse import ArgumentParser
 from pathlib import Path
+from typing import Optional
 
 # Mapping of common umlaut characters to their ASCII equivalents
 UMLAUT_MAP = {
@@ -14,6 +21,56 @@ UMLAUT_MAP = {
     'ß': 'ss', 'ẞ': 'Ss',
 }
 
+# Runs of control characters (ASCII value < 32)
+_CTRL_RE = re.compile(r'[\x00-\x1f]+')
+
+# Number of buffered rename messages emitted per log record
+_LOG_BATCH = 1024
+
+# Renames are syscall-bound, so oversubscribe the CPUs, within reason
+_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Directories queued or running at once, bounding how far the walk gets ahead
+_MAX_PENDING = _MAX_WORKERS * 4
+
+class _AsciiFoldTable(dict):
+    """str.translate table mapping codepoints to their ASCII replacement.
+    
+    Umlauts use UMLAUT_MAP. Anything else is decomposed with NFKD, which
+    separates the base character from its combining marks, and everything
+    left outside ASCII (including the marks) is dropped. NFKD decomposes
+    each character independently, so folding one character at a time gives
+    the same result as normalizing the whole name. Missing entries are
+    computed on first use and kept.
+    """
+    
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if char in UMLAUT_MAP:
+            folded = UMLAUT_MAP[char]
+        else:
+            folded = unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii')
+        self[codepoint] = folded
+        return folded
+
+# Precompute ASCII through Cyrillic (U+0000-U+04FF), which covers the accented
+# letters found in nearly all filenames; rarer characters are folded on demand
+_ASCII_FOLD = _AsciiFoldTable()
+for _codepoint in range(0x500):
+    _ASCII_FOLD[_codepoint]
+del _codepoint
+
+def _split_ext(name):
+    """Split a bare file name into (base, ext) at the last dot.
+    
+    Cheaper than os.path.splitext, which also has to handle separators, but
+    splits the same way: dots leading the name do not start an extension.
+    """
+    i = name.rfind('.')
+    if i > 0 and (name[0] != '.' or i > len(name) - len(name.lstrip('.'))):
+        return name[:i], name[i:]
+    return name, ''
+
 def clean_filename(filename: str, mode: str = 'preserve') -> str:
     """Clean and normalize a filename based on the specified mode.
     
@@ -47,31 +104,294 @@ def clean_filename(filename: str, mode: str = 'preserve') -> str:
     """
     if not isinstance(filename, str):
         raise TypeError("Filename must be a string")
-    if mode not in ['preserve', 'ascii']:
-        raise ValueError("Mode must be either 'preserve' or 'ascii'")
-        
-    # Handle control characters (characters with ASCII value < 32)
-    if '\x00' in filename or any(ord(c) < 32 for c in filename):
-        parts = re.split(r'[\x00-\x1f]+', filename)
-        filename = 'filewithNull' + os.path.splitext(parts[-1])[1] if parts[-1] else ''
+    return _cleaner_for(mode)(filename)
+
+def _cleaner_for(mode: str):
+    """Return the cleaning function for mode, validating it once.
     
+    Callers that clean many names with the same mode look the cleaner up once
+    instead of re-validating and branching on the mode for every name.
+    """
     if mode == 'ascii':
-        # First handle umlaut characters with their common ASCII equivalents
-        # e.g., 'ü' -> 'ue', 'ö' -> 'oe', etc.
-        for umlaut, replacement in UMLAUT_MAP.items():
-            filename = filename.replace(umlaut, replacement)
-        
-        # Normalize and remove diacritics using NFKD form
-        # This separates the base characters from their combining marks
-        # e.g., 'é' -> 'e', 'ñ' -> 'n', etc.
-        filename = unicodedata.normalize('NFKD', filename)
-        # Remove combining characters (like accents)
-        filename = ''.join(c for c in filename if not unicodedata.combining(c))
-        # Keep only ASCII characters (ord < 128)
-        filename = ''.join(c for c in filename if ord(c) < 128)
-    
+        return _clean_ascii
+    if mode == 'preserve':
+        return _clean_preserve
+    raise ValueError("Mode must be either 'preserve' or 'ascii'")
+
+def _strip_control(filename: str) -> str:
+    """Replace a name containing control characters (ASCII value < 32)."""
+    # Control characters are never printable, and isprintable() is several
+    # times cheaper than a regex search, so only suspicious names are searched
+    if not filename.isprintable() and _CTRL_RE.search(filename):
+        parts = _CTRL_RE.split(filename)
+        filename = 'filewithNull' + _split_ext(parts[-1])[1] if parts[-1] else ''
     return filename
 
+def _clean_preserve(filename: str) -> str:
+    """clean_filename for mode='preserve', without argument validation."""
+    # Printable names contain no control characters, which is all preserve
+    # mode would change, so skip the cache and the regex entirely
+    if filename.isprintable():
+        return filename
+    cleaned = _fix_preserve(filename)
+    return filename if cleaned is None else cleaned
+
+# Basenames such as 'index.html' or '__init__.py' repeat throughout a tree, and
+# the results only depend on the name, so the slow paths below are memoized.
+# They return None for names that need no change: a cached string would be the
+# one from the first call with an equal name, while handing back the caller's
+# own object lets the `new_name != name` check in the walk compare by identity
+
+@lru_cache(maxsize=1 << 16)
+def _fix_preserve(filename: str) -> Optional[str]:
+    """Slow path of _clean_preserve for names that are not printable."""
+    cleaned = _strip_control(filename)
+    return None if cleaned == filename else cleaned
+
+def _clean_ascii(filename: str) -> str:
+    """clean_filename for mode='ascii', without argument validation."""
+    # Printable ASCII names are already clean; isascii() is a flag check in
+    # CPython, so the common case never reaches the cache or the regex
+    if filename.isascii() and filename.isprintable():
+        return filename
+    cleaned = _fix_ascii(filename)
+    return filename if cleaned is None else cleaned
+
+@lru_cache(maxsize=1 << 16)
+def _fix_ascii(filename: str) -> Optional[str]:
+    """Slow path of _clean_ascii for non-ASCII or non-printable names."""
+    cleaned = _strip_control(filename)
+    
+    # Replace every non-ASCII character with its ASCII equivalent in one
+    # C-level pass over the name, e.g., 'ü' -> 'ue', 'é' -> 'e', 'ñ' -> 'n'
+    if not cleaned.isascii():
+        cleaned = cleaned.translate(_ASCII_FOLD)
+    return None if cleaned == filename else cleaned
+
+def _list_dir(path):
+    """Return (files, dirs) lists of os.DirEntry for path, or None if unreadable.
+    
+    The file type comes from the cached readdir data instead of an extra stat
+    per entry. Symlinks are listed with the files and never followed.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return None
+    
+    files = []
+    dirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            is_dir = False
+        (dirs if is_dir else files).append(entry)
+    return files, dirs
+
+def _walk_scandir(top):
+    """Walk a directory tree bottom-up using os.scandir.
+    
+    Works like os.walk(top, topdown=False) but yields (root, files, dirs) with
+    lists of os.DirEntry objects (see _list_dir); unreadable directories are
+    skipped. The walk keeps an explicit stack instead of recursing, so deep
+    trees cannot hit the recursion limit and each directory is yielded
+    directly instead of through one generator per ancestor.
+    """
+    top = os.fspath(top)
+    listing = _list_dir(top)
+    if listing is None:
+        return
+    
+    # Each frame holds a directory's listing and an iterator over the
+    # subdirectories that still have to be visited before it is yielded
+    stack = [(top, *listing, iter(listing[1]))]
+    while stack:
+        root, files, dirs, pending = stack[-1]
+        for entry in pending:
+            listing = _list_dir(entry.path)
+            if listing is not None:
+                stack.append((entry.path, *listing, iter(listing[1])))
+                break
+        else:
+            stack.pop()
+            yield root, files, dirs
+
+def _flush_log(logger, pending):
+    """Emit buffered (level, msg, args) messages in order.
+    
+    Runs of info messages are joined into a single record, and only formatted
+    when info logging is enabled; any other message gets a record of its own.
+    """
+    info_enabled = logger.isEnabledFor(logging.INFO)
+    lines = []
+    for level, msg, args in pending:
+        if level == logging.INFO:
+            if info_enabled:
+                lines.append(msg % args)
+            continue
+        if lines:
+            logger.info('\n'.join(lines))
+            lines = []
+        logger.log(level, msg, *args)
+    if lines:
+        logger.info('\n'.join(lines))
+    pending.clear()
+
+def _run_bottom_up(top, func, logger):
+    """Call func(root, files, dirs) for every directory under top, bottom-up.
+    
+    Each directory is handed to a thread pool (renames are syscall-bound and
+    release the GIL) as soon as the walk yields it. Its task first waits for
+    the tasks of its own subdirectories, which were submitted before it, so
+    a directory is never renamed before its contents and a failure in a
+    subdirectory propagates to its ancestors. At most _MAX_PENDING
+    directories are in flight at once, so the walk cannot run far ahead of
+    the renames and finished listings are dropped as the walk goes.
+    
+    func returns a list of (level, msg, args) messages. They are logged
+    through logger in walk order, errors included, with info lines batched
+    _LOG_BATCH at a time (see _flush_log).
+    """
+    def run(root, files, dirs, subdirs):
+        for future in subdirs:
+            future.result()
+        return func(root, files, dirs)
+    
+    # Futures of directories whose parent has not been yielded yet
+    waiting = {}
+    # Futures whose messages have not been logged yet, in walk order
+    in_flight = deque()
+    pending = []
+    
+    def drain(limit):
+        # Log finished directories in order, blocking while more than limit
+        # are in flight; consuming the results also propagates exceptions
+        while in_flight and (len(in_flight) > limit or in_flight[0].done()):
+            pending.extend(in_flight.popleft().result())
+            if len(pending) >= _LOG_BATCH:
+                _flush_log(logger, pending)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+            try:
+                for root, files, dirs in _walk_scandir(top):
+                    subdirs = [waiting.pop(entry.path) for entry in dirs if entry.path in waiting]
+                    future = executor.submit(run, root, files, dirs, subdirs)
+                    waiting[root] = future
+                    in_flight.append(future)
+                    drain(_MAX_PENDING)
+                drain(0)
+            finally:
+                # Only left over after an error; don't start the queued work
+                for future in in_flight:
+                    future.cancel()
+    finally:
+        _flush_log(logger, pending)
+
+def _load_renameat2():
+    """Return libc's renameat2 function, or None where it is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        func = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    func.restype = ctypes.c_int
+    return func
+
+_RENAMEAT2 = _load_renameat2()
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+
+def _load_renamex_np():
+    """Return libc's renamex_np function, or None where it is unavailable."""
+    if sys.platform != 'darwin':
+        return None
+    try:
+        func = ctypes.CDLL(None, use_errno=True).renamex_np
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint]
+    func.restype = ctypes.c_int
+    return func
+
+_RENAMEX_NP = _load_renamex_np()
+_RENAME_EXCL = 4
+
+def _rename_noreplace(src, dst):
+    """Rename src to dst, raising FileExistsError instead of replacing dst.
+    
+    On Linux this is a single renameat2(RENAME_NOREPLACE) call and on macOS
+    renamex_np(RENAME_EXCL), which close the window between checking for dst
+    and renaming onto it. Elsewhere, or when the kernel or filesystem lacks
+    the flag, dst is checked with lexists() first. That also catches names
+    the caller's sibling-name set cannot, such as a different case of an
+    existing name on a case-insensitive filesystem.
+    """
+    if _RENAMEAT2 is not None:
+        if _RENAMEAT2(_AT_FDCWD, os.fsencode(src), _AT_FDCWD, os.fsencode(dst), _RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.ENOSYS, errno.EINVAL):
+            raise OSError(err, os.strerror(err), src, None, dst)
+    elif _RENAMEX_NP is not None:
+        if _RENAMEX_NP(os.fsencode(src), os.fsencode(dst), _RENAME_EXCL) == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.ENOTSUP, errno.EINVAL):
+            raise OSError(err, os.strerror(err), src, None, dst)
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), src, None, dst)
+    os.rename(src, dst)
+
+def _rename_unique(prefix, old_path, new_name, names):
+    """Rename old_path to new_name in a directory without replacing anything.
+    
+    prefix is the directory path with a trailing separator, built once per
+    directory so targets are plain string concatenations. Uses new_name or
+    its first 'base-N.ext' variant not in names, moving on to the next
+    variant if the target appeared after the directory was listed. names is
+    updated and the final name returned.
+    """
+    while True:
+        final_name = _unique_name(new_name, names)
+        try:
+            _rename_noreplace(old_path, prefix + final_name)
+        except FileExistsError:
+            # Created after the directory was listed, try the next variant
+            names.add(final_name)
+            continue
+        names.add(final_name)
+        return final_name
+
+def _fast_move(src, dst):
+    """Move src to dst, where dst is known not to exist yet.
+    
+    Renaming within the processed tree normally stays on one filesystem, so a
+    single rename is enough; shutil.move is only needed across devices.
+    """
+    try:
+        _rename_noreplace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+def _unique_name(name, taken):
+    """Return name, or the first 'base-N.ext' variant of it not in taken."""
+    if name not in taken:
+        return name
+    base, ext = _split_ext(name)
+    counter = 1
+    candidate = f"{base}-{counter}{ext}"
+    while candidate in taken:
+        counter += 1
+        candidate = f"{base}-{counter}{ext}"
+    return candidate
+
 def process_directory(directory, mode='preserve', dry_run=False):
     """Process all files and directories in the given directory recursively.
     
@@ -82,7 +402,7 @@ def process_directory(directory, mode='preserve', dry_run=False):
     
     Raises:
         TypeError: If directory is None or not a string/path-like object
-        ValueError: If directory is empty or doesn't exist
+        ValueError: If directory is empty or doesn't exist, or mode is invalid
     
     Note:
         - Processes directories bottom-up to avoid path issues
@@ -102,57 +422,71 @@ def process_directory(directory, mode='preserve', dry_run=False):
     if not os.access(directory, os.R_OK | os.X_OK):
         raise PermissionError(f"Permission denied: {directory}")
     
-    # Process directories bottom-up to avoid path issues
-    for root, dirs, files in os.walk(directory, topdown=False):
+    cleaner = _cleaner_for(mode)
+    
+    def process_one_dir(root, files, dirs):
+        messages = []
+        # Names currently in this directory, kept in sync with the renames
+        # below so collisions are resolved without a stat per candidate
+        names = {entry.name for entry in files}
+        # Directories are tracked on their own too, as only they can be
+        # merged into; a file with the target name gets a unique name instead
+        dir_names = {entry.name for entry in dirs}
+        names.update(dir_names)
+        prefix = os.path.join(root, '')
+        
         # Process files first
-        for name in files:
-            old_path = os.path.join(root, name)
-            new_name = clean_filename(name, mode)
+        for entry in files:
+            name = entry.name
+            old_path = entry.path
+            new_name = cleaner(name)
             if new_name != name:
-                new_path = os.path.join(root, new_name)
                 if dry_run:
-                    logger.info(f"Would rename file: {old_path} -> {new_path}")
+                    # Claim the same unique name a real run would, so names
+                    # that clean to the same target are previewed correctly
+                    final_new_name = _unique_name(new_name, names)
+                    names.discard(name)
+                    names.add(final_new_name)
+                    messages.append((logging.INFO, "Would rename file: %s -> %s", (old_path, os.path.join(root, final_new_name))))
                 else:
-                    # If target exists, append a unique identifier
-                    final_new_path = new_path
-                    base, ext = os.path.splitext(new_name)
-                    counter = 1
-                    while os.path.exists(final_new_path):
-                        final_new_name = f"{base}-{counter}{ext}"
-                        final_new_path = os.path.join(root, final_new_name)
-                        counter += 1
                     try:
-                        os.rename(old_path, final_new_path)
-                        logger.info(f"Renamed file: {old_path} -> {final_new_path}")
+                        # If target exists, append a unique identifier
+                        final_new_name = _rename_unique(prefix, old_path, new_name, names)
+                        final_new_path = os.path.join(root, final_new_name)
+                        names.discard(name)
+                        messages.append((logging.INFO, "Renamed file: %s -> %s", (old_path, final_new_path)))
                     except OSError as e:
-                        logger.error(f"Error renaming file {old_path}: {e}")
+                        messages.append((logging.ERROR, "Error renaming file %s: %s", (old_path, e)))
         
         # Then process directories
-        for name in dirs:
-            old_path = os.path.join(root, name)
-            new_name = clean_filename(name, mode)
+        for entry in dirs:
+            name = entry.name
+            old_path = entry.path
+            new_name = cleaner(name)
             if new_name != name:
                 new_path = os.path.join(root, new_name)
                 if dry_run:
-                    logger.info(f"Would rename directory: {old_path} -> {new_path}")
+                    if new_name not in dir_names:
+                        new_name = _unique_name(new_name, names)
+                        new_path = os.path.join(root, new_name)
+                    names.discard(name)
+                    names.add(new_name)
+                    dir_names.discard(name)
+                    dir_names.add(new_name)
+                    messages.append((logging.INFO, "Would rename directory: %s -> %s", (old_path, new_path)))
                 else:
-                    if os.path.exists(new_path):
+                    if new_name in dir_names:
                         # Move all contents to the existing directory
+                        existing = set(os.listdir(new_path))
                         for item in os.listdir(old_path):
                             s = os.path.join(old_path, item)
                             d = os.path.join(new_path, item)
-                            if os.path.exists(d):
+                            if item in existing:
                                 # If destination exists, append a unique identifier for files, recurse for dirs
                                 if os.path.isfile(s):
-                                    base, ext = os.path.splitext(item)
-                                    counter = 1
-                                    new_file = f"{base}-{counter}{ext}"
-                                    d_new = os.path.join(new_path, new_file)
-                                    while os.path.exists(d_new):
-                                        counter += 1
-                                        new_file = f"{base}-{counter}{ext}"
-                                        d_new = os.path.join(new_path, new_file)
-                                    shutil.move(s, d_new)
+                                    new_file = _unique_name(item, existing)
+                                    _fast_move(s, os.path.join(new_path, new_file))
+                                    existing.add(new_file)
                                 else:
                                     # If it's a directory, recursively merge
                                     # For simplicity, recursively call this logic
@@ -161,15 +495,26 @@ def process_directory(directory, mode='preserve', dry_run=False):
                                         shutil.move(os.path.join(s, subitem), os.path.join(d, subitem))
                                     os.rmdir(s)
                             else:
-                                shutil.move(s, d)
+                                _fast_move(s, d)
+                                existing.add(item)
                         os.rmdir(old_path)
-                        logger.info(f"Merged and removed directory: {old_path} -> {new_path}")
+                        names.discard(name)
+                        dir_names.discard(name)
+                        messages.append((logging.INFO, "Merged and removed directory: %s -> %s", (old_path, new_path)))
                     else:
                         try:
-                            os.rename(old_path, new_path)
-                            logger.info(f"Renamed directory: {old_path} -> {new_path}")
+                            final_new_name = _rename_unique(prefix, old_path, new_name, names)
+                            final_new_path = os.path.join(root, final_new_name)
+                            names.discard(name)
+                            dir_names.discard(name)
+                            dir_names.add(final_new_name)
+                            messages.append((logging.INFO, "Renamed directory: %s -> %s", (old_path, final_new_path)))
                         except OSError as e:
-                            logger.error(f"Error renaming directory {old_path}: {e}")
+                            messages.append((logging.ERROR, "Error renaming directory %s: %s", (old_path, e)))
+        return messages
+    
+    # Process directories bottom-up to avoid path issues
+    _run_bottom_up(directory, process_one_dir, logger)
 
 def setup_logging(log_file=None, preserve_handlers=False):
     """Set up logging configuration.
@@ -205,75 +550,104 @@ def setup_logging(log_file=None, preserve_handlers=False):
 
 def process_path(path: Path, mode: str = 'preserve', dry_run: bool = True):
     """Process a path and show/make encoding fixes"""
-    for item in path.rglob('*'):
-        try:
-            current_name = item.name
-            new_name = clean_filename(current_name, mode=mode)
+    cleaner = _cleaner_for(mode)
+    
+    def process_one_dir(root, files, dirs):
+        messages = []
+        names = {entry.name for entry in files}
+        # Only directories can be merged into, see process_directory
+        dir_names = {entry.name for entry in dirs}
+        names.update(dir_names)
+        # Built once so targets are plain string concatenations; Path objects
+        # are only created for directories that get merged
+        prefix = os.path.join(root, '')
+        for entry in files + dirs:
+            try:
+                current_name = entry.name
+                new_name = cleaner(current_name)
             
-            if current_name != new_name:
-                parent_folder = item.parent.name or item.parent
-                if dry_run:
-                    if item.is_file():
-                        logging.info(f"Would rename file: {item} -> {item.parent / new_name}")
-                    else:
-                        logging.info(f"Would rename directory: {item} -> {item.parent / new_name}")
-                else:
-                    if item.is_file():
-                        # If target exists, append a unique identifier
-                        base, ext = os.path.splitext(new_name)
-                        counter = 1
-                        target = item.parent / new_name
-                        while target.exists():
-                            target = item.parent / f"{base}-{counter}{ext}"
-                            counter += 1
-                        try:
-                            shutil.move(str(item), str(target))
-                            logging.info(f"Renamed file: {item} -> {target}")
-                        except OSError as e:
-                            logging.error(f"Failed to rename [{parent_folder}] {current_name}: {e}")
-                    else:
-                        target = item.parent / new_name
-                        if target.exists():
-                            # Move all contents to the existing directory
-                            for subitem in item.iterdir():
-                                dest = target / subitem.name
-                                if dest.exists():
-                                    if subitem.is_file():
-                                        base, ext = os.path.splitext(subitem.name)
-                                        counter = 1
-                                        new_file = f"{base}-{counter}{ext}"
-                                        d_new = target / new_file
-                                        while d_new.exists():
-                                            counter += 1
-                                            new_file = f"{base}-{counter}{ext}"
-                                            d_new = target / new_file
-                                        shutil.move(str(subitem), str(d_new))
-                                    else:
-                                        # If it's a directory, recursively merge
-                                        for ssubitem in subitem.iterdir():
-                                            shutil.move(str(ssubitem), str(dest / ssubitem.name))
-                                        subitem.rmdir()
-                                else:
-                                    shutil.move(str(subitem), str(dest))
-                            item.rmdir()
-                            logging.info(f"Merged and removed directory: {item} -> {target}")
+                if current_name != new_name:
+                    # The walk already classified the entry from cached readdir data
+                    is_file = not entry.is_dir(follow_symlinks=False)
+                    if dry_run:
+                        # Claim the same name a real run would, so names that
+                        # clean to the same target are previewed correctly
+                        names.discard(current_name)
+                        if is_file:
+                            target_name = _unique_name(new_name, names)
+                            names.add(target_name)
+                            messages.append((logging.INFO, "Would rename file: %s -> %s", (entry.path, prefix + target_name)))
                         else:
+                            target_name = new_name if new_name in dir_names else _unique_name(new_name, names)
+                            names.add(target_name)
+                            dir_names.discard(current_name)
+                            dir_names.add(target_name)
+                            messages.append((logging.INFO, "Would rename directory: %s -> %s", (entry.path, prefix + target_name)))
+                    else:
+                        if is_file:
                             try:
-                                shutil.move(str(item), str(target))
-                                logging.info(f"Renamed directory: {item} -> {target}")
+                                # If target exists, append a unique identifier
+                                target_name = _rename_unique(prefix, entry.path, new_name, names)
+                                names.discard(current_name)
+                                messages.append((logging.INFO, "Renamed file: %s -> %s", (entry.path, prefix + target_name)))
                             except OSError as e:
-                                logging.error(f"Failed to rename [{parent_folder}] {current_name}: {e}")
-        except Exception as e:
-            logging.error(f"Error processing {item}: {e}")
+                                messages.append((logging.ERROR, "Failed to rename [%s] %s: %s", (os.path.basename(root) or root, current_name, e)))
+                        else:
+                            target = prefix + new_name
+                            if new_name in dir_names:
+                                # Move all contents to the existing directory
+                                item = Path(entry.path)
+                                target_dir = Path(target)
+                                existing = {p.name for p in target_dir.iterdir()}
+                                for subitem in item.iterdir():
+                                    dest = target_dir / subitem.name
+                                    if subitem.name in existing:
+                                        if subitem.is_file():
+                                            new_file = _unique_name(subitem.name, existing)
+                                            _fast_move(str(subitem), str(target_dir / new_file))
+                                            existing.add(new_file)
+                                        else:
+                                            # If it's a directory, recursively merge
+                                            for ssubitem in subitem.iterdir():
+                                                shutil.move(str(ssubitem), str(dest / ssubitem.name))
+                                            subitem.rmdir()
+                                    else:
+                                        _fast_move(str(subitem), str(dest))
+                                        existing.add(subitem.name)
+                                item.rmdir()
+                                names.discard(current_name)
+                                dir_names.discard(current_name)
+                                messages.append((logging.INFO, "Merged and removed directory: %s -> %s", (entry.path, target)))
+                            else:
+                                try:
+                                    target_name = _rename_unique(prefix, entry.path, new_name, names)
+                                    names.discard(current_name)
+                                    dir_names.discard(current_name)
+                                    dir_names.add(target_name)
+                                    messages.append((logging.INFO, "Renamed directory: %s -> %s", (entry.path, prefix + target_name)))
+                                except OSError as e:
+                                    messages.append((logging.ERROR, "Failed to rename [%s] %s: %s", (os.path.basename(root) or root, current_name, e)))
+            except Exception as e:
+                messages.append((logging.ERROR, "Error processing %s: %s", (entry.path, e)))
+        return messages
+    
+    # Walk bottom-up so renaming a directory never invalidates pending paths
+    _run_bottom_up(path, process_one_dir, logging.getLogger())
 
-def main():
+def _build_parser():
     parser = ArgumentParser(description='Fix character encoding issues in file and directory names')
     parser.add_argument('directory', help='Directory to process')
     parser.add_argument('--mode', choices=['preserve', 'ascii'], default='preserve',
                       help='preserve: keep valid UTF-8, ascii: convert to ASCII only')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done without making changes')
     parser.add_argument('--log-file', help='Path to the log file (if not specified, only console output is shown)')
-    args = parser.parse_args()
+    return parser
+
+# Built once and reused by every main() call
+_PARSER = _build_parser()
+
+def main():
+    args = _PARSER.parse_args()
 
     # Check if we're running in a test environment (pytest sets up handlers)
     root_logger = logging.getLogger()
@@ -284,10 +658,10 @@ def main():
     target = Path(args.directory)
     
     if not target.exists():
-        logging.error(f"Path does not exist: {target}")
+        logging.error("Path does not exist: %s", target)
         return
 
-    logging.info(f"Scanning {target}")
+    logging.info("Scanning %s", target)
     process_path(target, mode=args.mode, dry_run=args.dry_run)
     logging.info("Processing completed.")
 
@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 from io import StringIO
 from unifile import clean_filename, process_directory, main
+from unifile import unifile as unifile_module
 
 @pytest.fixture
 def temp_directory(tmp_path):
@@ -80,9 +81,112 @@ def test_process_directory_dry_run(temp_directory):
     after_files = set(os.listdir(temp_directory))
     assert original_files == after_files
 
-def test_invalid_directory():
+def test_process_directory_collision(tmp_path):
+    (tmp_path / "cafe.txt").write_text("ascii")
+    (tmp_path / "café.txt").write_text("accented")
+    (tmp_path / "cafe-1.txt").write_text("taken")
+    process_directory(str(tmp_path), mode='ascii', dry_run=False)
+    assert (tmp_path / "cafe.txt").read_text() == "ascii"
+    assert (tmp_path / "cafe-1.txt").read_text() == "taken"
+    assert (tmp_path / "cafe-2.txt").read_text() == "accented"
+
+def test_process_directory_dry_run_collision(tmp_path, setup_logging):
+    (tmp_path / "cafe.txt").write_text("ascii")
+    (tmp_path / "café.txt").write_text("accented")
+    process_directory(str(tmp_path), mode='ascii', dry_run=True)
+    log_output = setup_logging.getvalue()
+    assert f"café.txt -> {tmp_path / 'cafe-1.txt'}" in log_output
+    assert not (tmp_path / "cafe-1.txt").exists()
+
+def test_process_directory_dir_named_like_file(tmp_path):
+    # Same name in NFD and NFC, so both entries can coexist
+    (tmp_path / "cafe\u0301").write_text("file")
+    (tmp_path / "caf\u00e9").mkdir()
+    process_directory(str(tmp_path), mode='ascii', dry_run=False)
+    assert (tmp_path / "cafe").read_text() == "file"
+    assert (tmp_path / "cafe-1").is_dir()
+
+def test_unique_name():
+    taken = {"a.txt", "..foo", ".bashrc", "a."}
+    assert unifile_module._unique_name("b.txt", taken) == "b.txt"
+    assert unifile_module._unique_name("a.txt", taken) == "a-1.txt"
+    # Leading dots do not start an extension, like os.path.splitext
+    assert unifile_module._unique_name("..foo", taken) == "..foo-1"
+    assert unifile_module._unique_name(".bashrc", taken) == ".bashrc-1"
+    assert unifile_module._unique_name("a.", taken) == "a-1."
+
+def test_process_directory_merge(tmp_path):
+    (tmp_path / "muenchen").mkdir()
+    (tmp_path / "muenchen" / "a.txt").write_text("existing")
+    (tmp_path / "münchen").mkdir()
+    (tmp_path / "münchen" / "a.txt").write_text("merged")
+    (tmp_path / "münchen" / "b.txt").write_text("moved")
+    process_directory(str(tmp_path), mode='ascii', dry_run=False)
+    assert os.listdir(tmp_path) == ["muenchen"]
+    merged = tmp_path / "muenchen"
+    assert (merged / "a.txt").read_text() == "existing"
+    assert (merged / "a-1.txt").read_text() == "merged"
+    assert (merged / "b.txt").read_text() == "moved"
+
+def test_process_directory_error_order(tmp_path, setup_logging, monkeypatch):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "tést.txt").write_text("renamed")
+    (tmp_path / "café.txt").write_text("fails")
+    rename_unique = unifile_module._rename_unique
+    def failing_rename_unique(prefix, old_path, new_name, names):
+        if new_name == "cafe.txt":
+            raise PermissionError("denied")
+        return rename_unique(prefix, old_path, new_name, names)
+    monkeypatch.setattr(unifile_module, "_rename_unique", failing_rename_unique)
+    process_directory(str(tmp_path), mode='ascii', dry_run=False)
+    log_output = setup_logging.getvalue()
+    # The subdirectory is handled first, so its rename is logged first
+    assert log_output.index("Renamed file") < log_output.index("Error renaming file")
+
+@pytest.mark.skipif(unifile_module._RENAMEAT2 is None, reason="renameat2 not available")
+def test_rename_does_not_replace(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    with pytest.raises(FileExistsError):
+        unifile_module._rename_noreplace(str(tmp_path / "a.txt"), str(tmp_path / "b.txt"))
+    assert (tmp_path / "b.txt").read_text() == "b"
+
+def test_rename_fallback_does_not_replace(tmp_path, monkeypatch):
+    monkeypatch.setattr(unifile_module, "_RENAMEAT2", None)
+    monkeypatch.setattr(unifile_module, "_RENAMEX_NP", None)
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    with pytest.raises(FileExistsError):
+        unifile_module._rename_noreplace(str(tmp_path / "a.txt"), str(tmp_path / "b.txt"))
+    assert (tmp_path / "b.txt").read_text() == "b"
+    # An existing target missing from the sibling names gets the next variant
+    prefix = os.path.join(str(tmp_path), "")
+    assert unifile_module._rename_unique(prefix, str(tmp_path / "a.txt"), "b.txt", set()) == "b-1.txt"
+    assert (tmp_path / "b.txt").read_text() == "b"
+    assert (tmp_path / "b-1.txt").read_text() == "a"
+
+def test_process_directory_deep_tree(tmp_path):
+    # Nest deeper than a lowered recursion limit instead of the default one,
+    # which would need paths longer than macOS and Windows allow
+    path = str(tmp_path)
+    for _ in range(150):
+        path = os.path.join(path, "d")
+        os.mkdir(path)
+    with open(os.path.join(path, "tést.txt"), "w") as f:
+        f.write("test content")
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(100)
+    try:
+        process_directory(str(tmp_path), mode='ascii', dry_run=False)
+    finally:
+        sys.setrecursionlimit(old_limit)
+    assert os.path.exists(os.path.join(path, "test.txt"))
+
+def test_invalid_directory(tmp_path):
     with pytest.raises(ValueError):
         process_directory("non_existent_dir")
+    with pytest.raises(ValueError):
+        process_directory(str(tmp_path), mode='invalid_mode')
     with pytest.raises(ValueError):
         process_directory("")
     with pytest.raises(TypeError):
@@ -174,6 +278,22 @@ def test_main_cli(tmp_path, setup_logging):
     finally:
         sys.argv = old_argv
 
+def test_main_cli_nested(tmp_path, setup_logging):
+    """Test that nested entries are renamed before their parent directory."""
+    test_dir = tmp_path / "test_cli_nested"
+    nested = test_dir / "münchen" / "über"
+    nested.mkdir(parents=True)
+    (nested / "tést.txt").write_text("test content")
+    
+    old_argv = sys.argv
+    try:
+        sys.argv = ["unifile", str(test_dir), "--mode", "ascii"]
+        main()
+        assert (test_dir / "muenchen" / "ueber" / "test.txt").exists()
+        assert not (test_dir / "münchen").exists()
+    finally:
+        sys.argv = old_argv
+
 def test_main_cli_with_options(tmp_path, setup_logging):
     """Test the main CLI with various options."""
     # Create a test file